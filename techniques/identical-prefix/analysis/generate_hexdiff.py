@@ -8,43 +8,29 @@ Shows hex bytes, ASCII, and diff markers
 
 import sys
 
+# printable ascii -> itself, everything else -> '.'
+_PRINTABLE_TBL=bytes(c if 32<=c<127 else 0x2E for c in range(256))
+
+
 def hexdump_line(data, offset, other_data=None):
     """one line of hexdump with optional diff markers"""
-    hex_parts=[]
-    ascii_parts = []
-    diff_markers=[]
-
-    for i in range(16):
-        idx=offset + i
-        if idx<len(data):
-            byte=data[idx]
-            hex_parts.append(f"{byte:02X}")
-
-            # ascii repr
-            if 32<=byte<=126:
-                ascii_parts.append(chr(byte))
-            else:
-                ascii_parts.append('.')
-
-            # diff marker
-            if other_data and idx<len(other_data):
-                if byte!=other_data[idx]:
-                    diff_markers.append('X')
-                else:
-                    diff_markers.append('.')
-            else:
-                diff_markers.append('.')
-        else:
-            hex_parts.append("  ")
-            ascii_parts.append(" ")
-            diff_markers.append(" ")
+    chunk=data[offset:offset+16]
+    ref=other_data[offset:offset+16] if other_data else b""
+
+    # hex/ascii columns, short rows padded with blanks
+    hex_left=chunk[:8].hex(" ").upper().ljust(23)
+    hex_right = chunk[8:].hex(" ").upper().ljust(23)
+    ascii_str=chunk.translate(_PRINTABLE_TBL).decode("latin1").ljust(16)
+
+    # diff markers (per-byte walk only when the row differs)
+    if chunk.startswith(ref) or ref.startswith(chunk):
+        diff_str="."*len(chunk)
+    else:
+        diff_str="".join("X" if x!=y else "." for x,y in zip(chunk,ref))
+        diff_str+="."*(len(chunk)-len(diff_str))
+    diff_str=diff_str.ljust(16)
 
     # format: offset: hex1..hex8  hex9..hex16  |ascii|  diff
-    hex_left=" ".join(hex_parts[0:8])
-    hex_right = " ".join(hex_parts[8:16])
-    ascii_str="".join(ascii_parts)
-    diff_str = "".join(diff_markers)
-
     return f"{offset:02X}: {hex_left}  {hex_right}  {ascii_str}  {diff_str}"
 
 
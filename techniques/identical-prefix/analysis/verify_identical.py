@@ -12,90 +12,108 @@ from __future__ import annotations
 
 import argparse
 import hashlib
+import io
 import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional,Tuple,List
+from typing import Iterator,Optional,Tuple,List
 
 
 # helpers
-def md5sum(b: bytes) -> str:
-    return hashlib.md5(b).hexdigest()
+_HASH_CHUNK=1<<20
 
-def sha256sum(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()
+
+def digests(b: bytes) -> Tuple[str,str]:
+    # md5 + sha256 in one pass; memoryview keeps mmap pages copy-free
+    md5=hashlib.md5(usedforsecurity=False)
+    sha=hashlib.sha256()
+    with memoryview(b) as mv:
+        for off in range(0,len(mv),_HASH_CHUNK):
+            chunk=mv[off:off+_HASH_CHUNK]
+            md5.update(chunk)
+            sha.update(chunk)
+            chunk.release()
+    return md5.hexdigest(),sha.hexdigest()
+
+
+# printable ascii -> itself, everything else -> '.'
+_PRINTABLE_TBL=bytes(c if 32<=c<127 else 0x2E for c in range(256))
+
+
+def _hexdump_row(off: int,chunk: bytes) -> str:
+    asc=chunk.translate(_PRINTABLE_TBL).decode("latin1")
+    return f"{off:08x}  {chunk.hex(' '):<47}  |{asc}|"
+
+
+def _hexdump(data: bytes,start: int,length: int) -> str:
+    # shared formatter for hexdump_head/hexdump_region
+    end=min(start+length,len(data))
+    return "\n".join([_hexdump_row(off,data[off:min(off+16,end)]) for off in range(start,end,16)])
 
 
 def hexdump_head(data: bytes,n: int=96) -> str:
-    out=[]
-    for off in range(0,min(len(data),n),16):
-        chunk=data[off:off+16]
-        hexs=" ".join(f"{bb:02x}" for bb in chunk)
-        asc="".join(chr(bb) if 32<=bb<127 else "." for bb in chunk)
-        out.append(f"{off:08x}  {hexs:<47}  |{asc}|")
-    return "\n".join(out)
+    # whole 16-byte rows covering the first n bytes
+    return _hexdump(data,0,-(-n//16)*16)
 
 
 def hexdump_region(data: bytes,start: int,length: int) -> str:
     # hexdump a specific region
-    out=[]
-    end=min(start+length,len(data))
-    for off in range(start,end,16):
-        chunk=data[off:min(off+16,end)]
-        hexs=" ".join(f"{bb:02x}" for bb in chunk)
-        asc="".join(chr(bb) if 32<=bb<127 else "." for bb in chunk)
-        out.append(f"{off:08x}  {hexs:<47}  |{asc}|")
-    return "\n".join(out)
+    return _hexdump(data,start,length)
 
 
-def hexdump_with_diff_markers(data: bytes,other: bytes,max_bytes: int=384) -> List[str]:
-    # generate hexdump with difference markers on the right
-    lines=[]
+def hexdump_with_diff_markers(data: bytes,other: bytes,max_bytes: int=384) -> Iterator[str]:
+    # yield hexdump rows with difference markers on the right
     for offset in range(0,min(len(data),max_bytes),16):
-        hex_parts=[]
-        ascii_parts=[]
-        diff_markers=[]
-
-        for i in range(16):
-            idx=offset+i
-            if idx<len(data):
-                byte=data[idx]
-                hex_parts.append(f"{byte:02X}")
-
-                # ascii
-                if 32<=byte<=126:
-                    ascii_parts.append(chr(byte))
-                else:
-                    ascii_parts.append('.')
-
-                # diff marker
-                if idx<len(other):
-                    if byte!=other[idx]:
-                        diff_markers.append('X')
-                    else:
-                        diff_markers.append('.')
-                else:
-                    diff_markers.append('.')
+        chunk=data[offset:offset+16]
+        ref=other[offset:offset+16]
+
+        # hex columns, short rows padded with blanks
+        hex_left=chunk[:8].hex(" ").upper().ljust(23)
+        hex_right=chunk[8:].hex(" ").upper().ljust(23)
+        ascii_str=chunk.translate(_PRINTABLE_TBL).decode("latin1").ljust(16)
+
+        # diff marker (only walk bytes when the row actually differs)
+        if chunk.startswith(ref) or ref.startswith(chunk):
+            diff_str="."*len(chunk)
+        else:
+            diff_str="".join("X" if x!=y else "." for x,y in zip(chunk,ref))
+            diff_str+="."*(len(chunk)-len(diff_str))
+        diff_str=diff_str.ljust(16)
+
+        yield f"{offset:02X}: {hex_left}  {hex_right}  {ascii_str}  {diff_str}"
+
+
+# block size for memcmp-style slice compares
+_CMP_CHUNK=1<<16
+
+
+def _first_mismatch(a: bytes,b: bytes,lo: int,hi: int) -> int:
+    # index of first differing byte in [lo,hi) or -1
+    # nota: slice compares run in C, so only the narrowing loop is python
+    for c in range(lo,hi,_CMP_CHUNK):
+        end=min(c+_CMP_CHUNK,hi)
+        if a[c:end]==b[c:end]:
+            continue
+        while end-c>16:
+            mid=(c+end)//2
+            if a[c:mid]!=b[c:mid]:
+                end=mid
             else:
-                hex_parts.append("  ")
-                ascii_parts.append(" ")
-                diff_markers.append(" ")
-
-        # format
-        hex_left=" ".join(hex_parts[0:8])
-        hex_right=" ".join(hex_parts[8:16])
-        ascii_str=''.join(ascii_parts)
-        diff_str=''.join(diff_markers)
-
-        lines.append(f"{offset:02X}: {hex_left}  {hex_right}  {ascii_str}  {diff_str}")
-
-    return lines
+                c=mid
+        for i in range(c,end):
+            if a[i]!=b[i]:
+                return i
+    return -1
 
 
 def first_diff(a: bytes,b: bytes) -> Optional[Tuple[int,int,int]]:
     n=min(len(a),len(b))
-    for i in range(n):
-        if a[i]!=b[i]:
-            return i,a[i],b[i]
+    i=_first_mismatch(a,b,0,n)
+    if i!=-1:
+        return i,a[i],b[i]
     return None if len(a)==len(b) else (n,-1,-1)
 
 
@@ -103,12 +121,37 @@ def all_diffs_in_range(a: bytes, b: bytes,start: int,end: int) -> List[Tuple[int
     # find all differing bytes in a range
     out=[]
     n=min(len(a),len(b),end)
-    for i in range(start,n):
-        if a[i]!=b[i]:
-            out.append((i,a[i],b[i]))
+    i=_first_mismatch(a,b,start,n)
+    while i!=-1:
+        out.append((i,a[i],b[i]))
+        i=_first_mismatch(a,b,i+1,n)
     return out
 
 
+def map_file(p: Path):
+    # read-only mapping of a file (empty files can't be mmapped)
+    with open(p,"rb") as f:
+        if os.fstat(f.fileno()).st_size==0:
+            return b""
+        return mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+
+
+@lru_cache(maxsize=64)
+def _digests_cached(path_str: str,mtime_ns: int,size: int) -> Tuple[str,str]:
+    # mtime/size only key the cache, so a rewritten file gets re-hashed
+    m=map_file(Path(path_str))
+    try:
+        return digests(m)
+    finally:
+        if isinstance(m,mmap.mmap):
+            m.close()
+
+
+def file_digests(p: Path) -> Tuple[str,str]:
+    st=p.stat()
+    return _digests_cached(str(p),st.st_mtime_ns,st.st_size)
+
+
 def find_collision_block_bounds(a: bytes,b: bytes,first_diff_offset: int) -> Tuple[int,int]:
     # nota: fastcoll collision blocks are typically 128 bytes
     start=first_diff_offset
@@ -116,12 +159,10 @@ def find_collision_block_bounds(a: bytes,b: bytes,first_diff_offset: int) -> Tup
     start=(start//64)*64
     end=start+128
 
-    # extend end to include all diffs
-    i=end
-    while i<min(len(a),len(b)) and i<start+256:
-        if a[i]!=b[i]:
-            end=i+64
-        i+=1
+    # extend end to include all diffs (last one in the 256-byte window wins)
+    tail=all_diffs_in_range(a,b,end,start+256)
+    if tail:
+        end=tail[-1][0]+64
 
     return start,min(end,len(a),len(b))
 
@@ -147,28 +188,25 @@ def analyze(out_dir: Path) -> None:
     if missing:
         raise SystemExit(f"Missing required files in {out_dir}: {', '.join(missing)}")
 
-    # read files
-    c1_bin=c1_path.read_bytes()
-    c2_bin=c2_path.read_bytes()
-    result_a=result_a_path.read_bytes()
-    result_b=result_b_path.read_bytes()
+    # map files (no heap copies, pages come from the os cache)
+    c1_bin=map_file(c1_path)
+    c2_bin=map_file(c2_path)
+    result_a=map_file(result_a_path)
+    result_b=map_file(result_b_path)
 
     prefix=prefix_path.read_text() if prefix_path.exists() else "(no prefix.txt)"
     appendix=appendix_path.read_text() if appendix_path.exists() else "(no appendix.txt)"
 
+    # hash all four files concurrently (hashlib drops the GIL on big buffers)
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        (md5_c1,sha_c1),(md5_c2,sha_c2),(md5_a,sha_a),(md5_b,sha_b)=ex.map(
+            file_digests,(c1_path,c2_path,result_a_path,result_b_path))
+
     # binary files analysis
-    md5_c1=md5sum(c1_bin)
-    md5_c2=md5sum(c2_bin)
-    sha_c1=sha256sum(c1_bin)
-    sha_c2=sha256sum(c2_bin)
     size_c1=len(c1_bin)
     size_c2=len(c2_bin)
 
     # final files analysis
-    md5_a=md5sum(result_a)
-    md5_b=md5sum(result_b)
-    sha_a=sha256sum(result_a)
-    sha_b=sha256sum(result_b)
     size_a=len(result_a)
     size_b=len(result_b)
 
@@ -198,136 +236,141 @@ def analyze(out_dir: Path) -> None:
     collision_hex.append(hexdump_region(c2_bin,coll_start,coll_end-coll_start))
     (out_dir/"collision_block.hex").write_text("\n".join(collision_hex))
 
-    # build analysis.md
-    lines: List[str]=[]
-
-    lines.append("# Identical-Prefix MD5 Collision — Analysis\n")
-
-    lines.append("## Overview\n")
-    lines.append("This technique uses HashClash's `md5_fastcoll` to generate two files with:")
-    lines.append("- **Identical prefix** (the input prefix)")
-    lines.append("- **Different collision blocks** (128 bytes generated by md5_fastcoll)")
-    lines.append("- **Identical MD5 hash**")
-    lines.append("- **Different SHA-256 hash** (proving they are different files)\n")
-
-    lines.append("## Prefix\n")
-    lines.append("```")
-    lines.append(prefix)
-    lines.append("```\n")
-
-    lines.append("## Binary Collision Files (before appendix)\n")
-    lines.append(f"- **{c1_path.name}** — size: **{size_c1}** bytes")
-    lines.append(f"- **{c2_path.name}** — size: **{size_c2}** bytes\n")
-
-    lines.append("### Hashes (Binary)\n")
-    lines.append("```")
-    lines.append(f"MD5(c1.bin)    {md5_c1}")
-    lines.append(f"MD5(c2.bin)    {md5_c2}")
-    lines.append(f"MD5 match:     {md5_c1==md5_c2}")
-    lines.append("")
-    lines.append(f"SHA256(c1.bin) {sha_c1}")
-    lines.append(f"SHA256(c2.bin) {sha_c2}")
-    lines.append(f"SHA256 differ: {sha_c1!=sha_c2}")
-    lines.append("```\n")
-
-    lines.append("### Collision Block Details\n")
-    lines.append("```")
-    lines.append(f"First difference at byte:    {off_bin} (0x{off_bin:X})")
-    lines.append(f"  c1.bin[{off_bin}] = 0x{b1:02X}")
-    lines.append(f"  c2.bin[{off_bin}] = 0x{b2:02X}")
-    lines.append("")
-    lines.append(f"Collision block region:      {coll_start}-{coll_end} ({coll_end-coll_start} bytes)")
-    lines.append(f"Total differing bytes:       {len(coll_diffs)}")
-    lines.append("```\n")
+    # build analysis.md (buffered writes, no list + join)
+    md=io.StringIO()
+
+    print("# Identical-Prefix MD5 Collision — Analysis\n",file=md)
+
+    print("## Overview\n",file=md)
+    print("This technique uses HashClash's `md5_fastcoll` to generate two files with:",file=md)
+    print("- **Identical prefix** (the input prefix)",file=md)
+    print("- **Different collision blocks** (128 bytes generated by md5_fastcoll)",file=md)
+    print("- **Identical MD5 hash**",file=md)
+    print("- **Different SHA-256 hash** (proving they are different files)\n",file=md)
+
+    print("## Prefix\n",file=md)
+    print("```",file=md)
+    print(prefix,file=md)
+    print("```\n",file=md)
+
+    print("## Binary Collision Files (before appendix)\n",file=md)
+    print(f"- **{c1_path.name}** — size: **{size_c1}** bytes",file=md)
+    print(f"- **{c2_path.name}** — size: **{size_c2}** bytes\n",file=md)
+
+    print("### Hashes (Binary)\n",file=md)
+    print("```",file=md)
+    print(f"MD5(c1.bin)    {md5_c1}",file=md)
+    print(f"MD5(c2.bin)    {md5_c2}",file=md)
+    print(f"MD5 match:     {md5_c1==md5_c2}",file=md)
+    print("",file=md)
+    print(f"SHA256(c1.bin) {sha_c1}",file=md)
+    print(f"SHA256(c2.bin) {sha_c2}",file=md)
+    print(f"SHA256 differ: {sha_c1!=sha_c2}",file=md)
+    print("```\n",file=md)
+
+    print("### Collision Block Details\n",file=md)
+    print("```",file=md)
+    print(f"First difference at byte:    {off_bin} (0x{off_bin:X})",file=md)
+    print(f"  c1.bin[{off_bin}] = 0x{b1:02X}",file=md)
+    print(f"  c2.bin[{off_bin}] = 0x{b2:02X}",file=md)
+    print("",file=md)
+    print(f"Collision block region:      {coll_start}-{coll_end} ({coll_end-coll_start} bytes)",file=md)
+    print(f"Total differing bytes:       {len(coll_diffs)}",file=md)
+    print("```\n",file=md)
 
     if len(coll_diffs)<=20:
-        lines.append("### All Differing Bytes in Collision Block\n")
-        lines.append("```")
+        print("### All Differing Bytes in Collision Block\n",file=md)
+        print("```",file=md)
         for i,x,y in coll_diffs:
-            lines.append(f"  byte {i:5d} (0x{i:04X}):  {x:02X} -> {y:02X}")
-        lines.append("```\n")
+            print(f"  byte {i:5d} (0x{i:04X}):  {x:02X} -> {y:02X}",file=md)
+        print("```\n",file=md)
     else:
-        lines.append("### First 20 Differing Bytes in Collision Block\n")
-        lines.append("```")
+        print("### First 20 Differing Bytes in Collision Block\n",file=md)
+        print("```",file=md)
         for i,x,y in coll_diffs[:20]:
-            lines.append(f"  byte {i:5d} (0x{i:04X}):  {x:02X} -> {y:02X}")
-        lines.append(f"  ... and {len(coll_diffs)-20} more")
-        lines.append("```\n")
-
-    lines.append("---\n")
-
-    lines.append("## Appendix (Common Suffix)\n")
-    lines.append("```")
-    lines.append(appendix)
-    lines.append("```\n")
-
-    lines.append("## Final Files (after appendix)\n")
-    lines.append(f"- **{result_a_path.name}** — size: **{size_a}** bytes")
-    lines.append(f"- **{result_b_path.name}** — size: **{size_b}** bytes\n")
-
-    lines.append("### Hashes (Final)\n")
-    lines.append("```")
-    lines.append(f"MD5(result_A.txt)    {md5_a}")
-    lines.append(f"MD5(result_B.txt)    {md5_b}")
-    lines.append(f"MD5 match:           {md5_a==md5_b}")
-    lines.append("")
-    lines.append(f"SHA256(result_A.txt) {sha_a}")
-    lines.append(f"SHA256(result_B.txt) {sha_b}")
-    lines.append(f"SHA256 differ:       {sha_a!=sha_b}")
-    lines.append("```\n")
-
-    lines.append("## Merkle-Damgård Property Verification\n")
-    lines.append("The MD5 hash function uses the Merkle-Damgård construction, which means:")
-    lines.append("> **If MD5(A) = MD5(B), then MD5(A||C) = MD5(B||C)** for any suffix C\n")
-    lines.append("```")
-    lines.append(f"MD5 preserved after appending common suffix: {md5_preserved}")
-    lines.append("")
-    lines.append(f"Before: MD5(c1.bin) = {md5_c1}")
-    lines.append(f"        MD5(c2.bin) = {md5_c2}")
-    lines.append(f"After:  MD5(result_A.txt) = {md5_a}")
-    lines.append(f"        MD5(result_B.txt) = {md5_b}")
-    lines.append("```\n")
-
-    lines.append("---\n")
+            print(f"  byte {i:5d} (0x{i:04X}):  {x:02X} -> {y:02X}",file=md)
+        print(f"  ... and {len(coll_diffs)-20} more",file=md)
+        print("```\n",file=md)
+
+    print("---\n",file=md)
+
+    print("## Appendix (Common Suffix)\n",file=md)
+    print("```",file=md)
+    print(appendix,file=md)
+    print("```\n",file=md)
+
+    print("## Final Files (after appendix)\n",file=md)
+    print(f"- **{result_a_path.name}** — size: **{size_a}** bytes",file=md)
+    print(f"- **{result_b_path.name}** — size: **{size_b}** bytes\n",file=md)
+
+    print("### Hashes (Final)\n",file=md)
+    print("```",file=md)
+    print(f"MD5(result_A.txt)    {md5_a}",file=md)
+    print(f"MD5(result_B.txt)    {md5_b}",file=md)
+    print(f"MD5 match:           {md5_a==md5_b}",file=md)
+    print("",file=md)
+    print(f"SHA256(result_A.txt) {sha_a}",file=md)
+    print(f"SHA256(result_B.txt) {sha_b}",file=md)
+    print(f"SHA256 differ:       {sha_a!=sha_b}",file=md)
+    print("```\n",file=md)
+
+    print("## Merkle-Damgård Property Verification\n",file=md)
+    print("The MD5 hash function uses the Merkle-Damgård construction, which means:",file=md)
+    print("> **If MD5(A) = MD5(B), then MD5(A||C) = MD5(B||C)** for any suffix C\n",file=md)
+    print("```",file=md)
+    print(f"MD5 preserved after appending common suffix: {md5_preserved}",file=md)
+    print("",file=md)
+    print(f"Before: MD5(c1.bin) = {md5_c1}",file=md)
+    print(f"        MD5(c2.bin) = {md5_c2}",file=md)
+    print(f"After:  MD5(result_A.txt) = {md5_a}",file=md)
+    print(f"        MD5(result_B.txt) = {md5_b}",file=md)
+    print("```\n",file=md)
+
+    print("---\n",file=md)
 
     # add visual hexdump comparison
-    lines.append("## Visual Hexdump Comparison\n")
-    lines.append("Side-by-side comparison showing the collision structure:\n")
-    lines.append("```")
-    lines.append("Legend: '.' = identical byte, 'X' = different byte")
-    lines.append("")
-    lines.append("=== result_A.txt ===")
-    lines.extend(hexdump_with_diff_markers(result_a,result_b))
-    lines.append("")
-    lines.append("=== result_B.txt ===")
-    lines.extend(hexdump_with_diff_markers(result_b,result_a))
-    lines.append("```\n")
+    print("## Visual Hexdump Comparison\n",file=md)
+    print("Side-by-side comparison showing the collision structure:\n",file=md)
+    print("```",file=md)
+    print("Legend: '.' = identical byte, 'X' = different byte",file=md)
+    print("",file=md)
+    print("=== result_A.txt ===",file=md)
+    md.writelines(f"{row}\n" for row in hexdump_with_diff_markers(result_a,result_b))
+    print("",file=md)
+    print("=== result_B.txt ===",file=md)
+    md.writelines(f"{row}\n" for row in hexdump_with_diff_markers(result_b,result_a))
+    print("```\n",file=md)
 
     # structure breakdown
-    lines.append("### Structure Breakdown\n")
-    lines.append("```")
-    lines.append("Bytes 0x00-0x3F (0-63):   PREFIX (readable text + padding)")
-    lines.append(f'  0x00-0x20: "{prefix.strip()}"')
-    lines.append("  0x21-0x3F: Null padding to 64-byte boundary")
-    lines.append("")
-    lines.append(f"Bytes 0x40-0xBF (64-191): COLLISION BLOCK (128 bytes)")
-    lines.append("  Generated by md5_fastcoll")
-    lines.append(f"  Only {len(coll_diffs)} bytes differ between the two files")
+    print("### Structure Breakdown\n",file=md)
+    print("```",file=md)
+    print("Bytes 0x00-0x3F (0-63):   PREFIX (readable text + padding)",file=md)
+    print(f'  0x00-0x20: "{prefix.strip()}"',file=md)
+    print("  0x21-0x3F: Null padding to 64-byte boundary",file=md)
+    print("",file=md)
+    print(f"Bytes 0x40-0xBF (64-191): COLLISION BLOCK (128 bytes)",file=md)
+    print("  Generated by md5_fastcoll",file=md)
+    print(f"  Only {len(coll_diffs)} bytes differ between the two files",file=md)
     hex_diffs=", ".join(f"0x{i:02X}" for i,_,_ in coll_diffs)
-    lines.append(f"  Differences at: {hex_diffs}")
-    lines.append("")
-    lines.append(f"Bytes 0xC0-EOF (192-{size_a}):  IDENTICAL SUFFIX ({size_a-192} bytes)")
-    lines.append('  "--- Appendix (readable) ---"')
-    lines.append('  "Course: 02232 Applied Cryptography (Fall 2025)"')
-    lines.append('  "Note: Appending the SAME bytes to both files preserves..."')
-    lines.append("```\n")
-
-    lines.append("---\n")
-    lines.append("**Course:** 02232 Applied Cryptography (Fall 2025)")
-    lines.append("**Note:** Appending the SAME bytes to both files preserves the MD5 collision (Merkle-Damgård).")
+    print(f"  Differences at: {hex_diffs}",file=md)
+    print("",file=md)
+    print(f"Bytes 0xC0-EOF (192-{size_a}):  IDENTICAL SUFFIX ({size_a-192} bytes)",file=md)
+    print('  "--- Appendix (readable) ---"',file=md)
+    print('  "Course: 02232 Applied Cryptography (Fall 2025)"',file=md)
+    print('  "Note: Appending the SAME bytes to both files preserves..."',file=md)
+    print("```\n",file=md)
+
+    print("---\n",file=md)
+    print("**Course:** 02232 Applied Cryptography (Fall 2025)",file=md)
+    print("**Note:** Appending the SAME bytes to both files preserves the MD5 collision (Merkle-Damgård).",file=md)
 
     # write analysis
-    (out_dir/"analysis.md").write_text("\n".join(lines))
+    (out_dir/"analysis.md").write_text(md.getvalue())
+
+    # release mappings
+    for m in (c1_bin,c2_bin,result_a,result_b):
+        if isinstance(m,mmap.mmap):
+            m.close()
 
     # summary output
     print(f"[identical-prefix] Binary MD5: {md5_c1[:16]}... == {md5_c2[:16]}... | Final MD5: {md5_a[:16]}... == {md5_b[:16]}...")
@@ -13,62 +13,131 @@ checks:
 from __future__ import annotations
 
 import argparse
-import gzip
 import hashlib
-import io
 import json
+import mmap
 import os
 import shutil
 import struct
 import subprocess
 import tempfile
+import zlib
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional,Tuple,List,Dict
 
 
 # helpers
-def md5sum(b: bytes) -> str:
-    return hashlib.md5(b).hexdigest()
-
 def sha256sum(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
 
+_HASH_CHUNK=1<<20
+
+
+def digests(b: bytes) -> Tuple[str,str]:
+    # md5 + sha256 in one pass; memoryview keeps mmap pages copy-free
+    md5=hashlib.md5(usedforsecurity=False)
+    sha=hashlib.sha256()
+    with memoryview(b) as mv:
+        for off in range(0,len(mv),_HASH_CHUNK):
+            chunk=mv[off:off+_HASH_CHUNK]
+            md5.update(chunk)
+            sha.update(chunk)
+            chunk.release()
+    return md5.hexdigest(),sha.hexdigest()
+
+
+# printable ascii -> itself, everything else -> '.'
+_PRINTABLE_TBL=bytes(c if 32<=c<127 else 0x2E for c in range(256))
+
+
 def hexdump_head(data: bytes, n: int=96) -> str:
     out=[]
     for off in range(0,min(len(data),n),16):
         chunk=data[off:off+16]
-        hexs=" ".join(f"{bb:02x}" for bb in chunk)
-        asc="".join(chr(bb) if 32<=bb<127 else "." for bb in chunk)
+        hexs=chunk.hex(" ")
+        asc=chunk.translate(_PRINTABLE_TBL).decode("ascii")
         out.append(f"{off:08x}  {hexs:<47}  |{asc}|")
     return "\n".join(out)
 
 
+# block size for memcmp-style slice compares
+_CMP_CHUNK=1<<16
+
+
+def _first_mismatch(a: bytes,b: bytes,lo: int,hi: int) -> int:
+    # index of first differing byte in [lo,hi) or -1
+    # nota: slice compares run in C, so only the narrowing loop is python
+    for c in range(lo,hi,_CMP_CHUNK):
+        end=min(c+_CMP_CHUNK,hi)
+        if a[c:end]==b[c:end]:
+            continue
+        while end-c>16:
+            mid=(c+end)//2
+            if a[c:mid]!=b[c:mid]:
+                end=mid
+            else:
+                c=mid
+        for i in range(c,end):
+            if a[i]!=b[i]:
+                return i
+    return -1
+
+
+def _common_tail(a: bytes,b: bytes) -> int:
+    # length of the identical (end-aligned) tail of a and b
+    la,lb=len(a),len(b)
+    m=min(la,lb)
+    k=0
+    while k<m:
+        step=min(_CMP_CHUNK,m-k)
+        if a[la-k-step:la-k]==b[lb-k-step:lb-k]:
+            k+=step
+            continue
+        # mismatch is inside this window, narrow it down from the end
+        while step>16:
+            half=step//2
+            if a[la-k-half:la-k]==b[lb-k-half:lb-k]:
+                k+=half
+                step-=half
+            else:
+                step=half
+        while a[la-k-1]==b[lb-k-1]:
+            k+=1
+        break
+    return k
+
+
 def first_diff(a: bytes,b: bytes) -> Optional[Tuple[int,int,int]]:
     n=min(len(a),len(b))
-    for i in range(n):
-        if a[i]!=b[i]:
-            return i,a[i],b[i]
+    i=_first_mismatch(a,b,0,n)
+    if i!=-1:
+        return i,a[i],b[i]
     return None if len(a)==len(b) else (n,-1,-1)
 
 
 def all_diffs_upto(a: bytes,b: bytes,limit_inclusive: int) -> List[Tuple[int,int,int]]:
     out=[]
     n=min(len(a),len(b),limit_inclusive+1)
-    for i in range(n):
-        if a[i]!=b[i]:
-            out.append((i,a[i],b[i]))
+    i=_first_mismatch(a,b,0,n)
+    while i!=-1:
+        out.append((i,a[i],b[i]))
+        i=_first_mismatch(a,b,i+1,n)
     return out
 
 
 def common_suffix_start(a: bytes,b: bytes) -> int:
     # find where identical tail begins
-    i=1
-    m=min(len(a),len(b))
-    while i<=m and a[-i]==b[-i]:
-        i+=1
-    i-=1
-    return len(a)-i
+    return len(a)-_common_tail(a,b)
+
+
+def map_file(p: Path):
+    # read-only mapping of a file (empty files can't be mmapped)
+    with open(p,"rb") as f:
+        if os.fstat(f.fileno()).st_size==0:
+            return b""
+        return mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
 
 
 def have(cmd: str) -> bool:
@@ -76,31 +145,40 @@ def have(cmd: str) -> bool:
 
 
 # jpeg parsing
+# markers without a length field: SOI, EOI, TEM, RST0-7
+_JPEG_STANDALONE=bytearray(256)
+for _m in (0xD8,0xD9,0x01,*range(0xD0,0xD8)):
+    _JPEG_STANDALONE[_m]=1
+del _m
+
 def jpeg_find_second_com(data: bytes) -> Optional[Tuple[int,int,int,int]]:
     """
     returns (marker_pos, len_pos, length, next_from_marker) for 2nd COM segment
     marker = FF FE
     """
-    if not(len(data)>=4 and data[0:2]==b"\xFF\xD8"):
+    n=len(data)
+    if not(n>=4 and data[0:2]==b"\xFF\xD8"):
         return None
+    # nota: hot loop, keep len/find as locals
+    find=data.find
     i=2
     com_seen=0
-    while i+3<=len(data):
-        # scan for 0xFF
-        if data[i]!=0xFF:
-            i+=1
-            continue
+    while i+3<=n:
+        # jump to next 0xFF (C-level find instead of a byte loop)
+        i=find(b"\xFF",i)
+        if i==-1 or i+3>n:
+            break
         j=i
-        while j<len(data) and data[j]==0xFF:
+        while j<n and data[j]==0xFF:
             j+=1
-        if j>=len(data):
+        if j>=n:
             break
         marker=data[j]
         i=j+1
         # standalone markers (no len field)
-        if marker in (0xD8,0xD9,0x01) or (0xD0<=marker<=0xD7):
+        if _JPEG_STANDALONE[marker]:
             continue
-        if i+1>=len(data):
+        if i+1>=n:
             break
         L=(data[i]<<8)|data[i+1]  # big endian
         if marker==0xFE:  # COM marker
@@ -129,18 +207,28 @@ def pdf_find_eofs(data: bytes) -> Tuple[int,int,int]:
 
 
 # gzip parsing
-def gzip_parse_header(b: bytes) -> Tuple[int,Dict]:
-    # returns (header_len, info_dict)
-    if not(len(b)>=10 and b[0:2]==b"\x1f\x8b"):
+# nota: ISA-L inflate is optional; isal_zlib is a drop-in for zlib
+try:
+    from isal import isal_zlib as _inflate
+except ImportError:
+    _inflate=zlib
+
+_GZIP_FIXED=struct.Struct("<BBBBIBB")  # ID1 ID2 CM FLG MTIME XFL OS
+
+
+def gzip_parse_header(b: bytes,start: int=0) -> Tuple[int,Dict]:
+    # returns (header_len, info_dict) for the member starting at b[start]
+    if len(b)-start<10:
         return 0,{"valid":False}
-    cm,flg=b[2],b[3]
-    mtime=struct.unpack("<I",b[4:8])[0]
-    xfl,os_=b[8],b[9]
-    i=10
+    # fixed 10-byte part in one unpack, read in place (no slice copies)
+    id1,id2,cm,flg,mtime,xfl,os_=_GZIP_FIXED.unpack_from(b,start)
+    if (id1,id2)!=(0x1f,0x8b):
+        return 0,{"valid":False}
+    i=start+10
     info={"valid":True,"cm":cm,"flg":flg,"mtime":mtime,"xfl":xfl,"os":os_,
           "fname":None,"comment":None,"xlen":None}
     if flg&0x04:  # FEXTRA
-        xlen=struct.unpack("<H",b[i:i+2])[0]
+        xlen,=struct.unpack_from("<H",b,i)
         i+=2
         info["xlen"]=xlen
         i+=xlen
@@ -154,27 +242,44 @@ def gzip_parse_header(b: bytes) -> Tuple[int,Dict]:
         i=j+1
     if flg&0x02:  # FHCRC
         i+=2
-    return i,info
+    return i-start,info
 
 
 def gzip_decompress_all(b: bytes) -> bytes:
-    # decompress all gzip members
+    # decompress all gzip members: parse each header ourselves and
+    # raw-inflate the body, no GzipFile object per member
     out=bytearray()
-    bio=io.BytesIO(b)
-    while True:
-        pos=bio.tell()
-        try:
-            with gzip.GzipFile(fileobj=bio) as gz:
-                out.extend(gz.read())
-            if bio.tell()==pos:  # no progress
-                break
-            if bio.tell()>=len(b):
-                break
-        except OSError:
-            break
+    off=0
+    with memoryview(b) as mv:
+        while off<len(b):
+            hlen,info=gzip_parse_header(b,off)
+            if not info["valid"]:
+                if off==0:
+                    raise ValueError("not a gzip file")
+                break  # padding / trailing garbage
+            d=_inflate.decompressobj(-zlib.MAX_WBITS)
+            member=d.decompress(mv[off+hlen:])
+            if not d.eof:
+                raise EOFError("truncated gzip member")
+            end=len(b)-len(d.unused_data)
+            if len(b)-end<8:
+                raise EOFError("truncated gzip trailer")
+            crc,isize=struct.unpack_from("<II",b,end)
+            if crc!=zlib.crc32(member):
+                raise ValueError("gzip CRC32 mismatch")
+            if isize!=len(member)&0xffffffff:
+                raise ValueError("gzip ISIZE mismatch")
+            out+=member
+            off=end+8
     return bytes(out)
 
 
+# parsed manifests, keyed on mtime so edits are picked up
+@lru_cache(maxsize=256)
+def _load_manifest(path_str: str,mtime_ns: int) -> Dict:
+    return json.loads(Path(path_str).read_text())
+
+
 # resolve output filenames from manifest or defaults
 def resolve_outputs(out_dir: Path,fmt: str) -> Tuple[Path,Path,str]:
     """
@@ -186,7 +291,7 @@ def resolve_outputs(out_dir: Path,fmt: str) -> Tuple[Path,Path,str]:
     man=out_dir/"manifest.json"
     if man.exists():
         try:
-            data=json.loads(man.read_text())
+            data=_load_manifest(str(man),man.stat().st_mtime_ns)
             arts=data.get("artifacts",[])
             if len(arts)>=2:
                 p1=out_dir/arts[0]
@@ -228,13 +333,16 @@ def analyze(fmt: str,out_dir: Path,inputs_dir: Optional[Path],emit_tools: bool)
     if not c1_path.exists() or not c2_path.exists():
         raise SystemExit(f"missing outputs in {out_dir} (need {c1_path.name} & {c2_path.name})")
 
-    c1=c1_path.read_bytes()
-    c2=c2_path.read_bytes()
+    # map files (no heap copies, pages come from the os cache)
+    c1=map_file(c1_path)
+    c2=map_file(c2_path)
 
     # calc hashes
-    md5_1,md5_2=md5sum(c1),md5sum(c2)
-    sha_1,sha_2=sha256sum(c1),sha256sum(c2)
+    md5_1,sha_1=digests(c1)
+    md5_2,sha_2=digests(c2)
     s1,s2=len(c1),len(c2)
+    # forward scan stops at the first diff, backward scan at the last one,
+    # so together they cover each byte at most once
     fd=first_diff(c1,c2)
     if not fd:
         raise SystemExit("files are identical - no collision")
@@ -328,6 +436,11 @@ def analyze(fmt: str,out_dir: Path,inputs_dir: Optional[Path],emit_tools: bool)
     lines+=fmt_lines
     (out_dir/"analysis.md").write_text("\n".join(lines))
 
+    # release mappings
+    for m in (c1,c2):
+        if isinstance(m,mmap.mmap):
+            m.close()
+
     # print summary
     print(f"[{fmt}] MD5: {md5_1} == {md5_2} | SHA256 differ | size {s1}=={s2} | suffix@{suffix_start} len={suffix_len}")
     print(f"Wrote: {out_dir/'analysis.md'}, {out_dir/'c1.head.hex'}, {out_dir/'c2.head.hex'}")
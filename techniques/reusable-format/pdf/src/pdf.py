@@ -6,7 +6,7 @@
 # - tolerates mutool vs mutool.exe
 # - uses a bytes-keyed mapping for bytes template formatting
 
-import os, sys, shutil, hashlib
+import os, re, sys, shutil, hashlib, subprocess
 
 # --- choose mutool binary ----------------------------------------------------
 def pick_mutool():
@@ -17,6 +17,11 @@ def pick_mutool():
 
 MUTOOL = pick_mutool()
 
+def mutool(*args):
+  # exec mutool directly (os.system went through an extra /bin/sh);
+  # exit status ignored as before, later reads fail loudly if it broke
+  subprocess.run([MUTOOL, *args])
+
 # --- tiny helpers ------------------------------------------------------------
 def EnclosedString(d: bytes, starts: bytes, ends: bytes) -> bytes:
   off = d.find(starts)
@@ -30,11 +35,38 @@ def getCount(d: bytes) -> int:
   s = EnclosedString(d, b"/Count ", b"/")
   return int(s)
 
+def readCount(path: str, head: int = 65536) -> int:
+  # mutool puts the page tree near the top: read only the head, and
+  # the rest of the file only if "/Count <n>/" isn't complete in it
+  with open(path, "rb") as f:
+    d = f.read(head)
+    off = d.find(b"/Count ")
+    if off < 0 or d.find(b"/", off + len(b"/Count ")) < 0:
+      d += f.read()
+  return getCount(d)
+
+def write_parts(path: str, parts) -> str:
+  # write parts in order, hashing them on the way; returns md5 hex
+  h = hashlib.md5(usedforsecurity=False)
+  with open(path, "wb") as f:
+    for part in parts:
+      f.write(part)
+      h.update(part)
+  return h.hexdigest()
+
 def procreate(lst) -> bytes:
   # join object refs as "... 0 R ..."
   return b" 0 R ".join(lst) + b" 0 R"
 
 # --- generate a minimal valid 1-page PDF (dummy.pdf) -------------------------
+# static object bodies, numbered 1..N in order
+DUMMY_OBJECTS = (
+  b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n",
+  b"2 0 obj\n<< /Type /Pages /Count 1 /Kids [3 0 R] >>\nendobj\n",
+  b"3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 1 1] /Contents 4 0 R /Resources <<>> >>\nendobj\n",
+  b"4 0 obj\n<< /Length 0 >>\nstream\n\nendstream\nendobj\n",
+)
+
 def write_minimal_dummy_pdf(path: str):
   """
   Writes a small, valid PDF with:
@@ -44,39 +76,34 @@ def write_minimal_dummy_pdf(path: str):
     4 0 obj: empty stream
   Proper xref + trailer + startxref included.
   """
-  buf = bytearray()
-  def w(b): buf.extend(b)
-  def tell(): return len(buf)
-
-  w(b"%PDF-1.4\n")
+  # collect parts and join once; offsets come from a running counter
+  parts = [b"%PDF-1.4\n"]
+  pos = len(parts[0])
   offsets = {}
 
-  offsets[1] = tell()
-  w(b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
-
-  offsets[2] = tell()
-  w(b"2 0 obj\n<< /Type /Pages /Count 1 /Kids [3 0 R] >>\nendobj\n")
-
-  offsets[3] = tell()
-  w(b"3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 1 1] /Contents 4 0 R /Resources <<>> >>\nendobj\n")
-
-  offsets[4] = tell()
-  w(b"4 0 obj\n<< /Length 0 >>\nstream\n\nendstream\nendobj\n")
-
-  startxref = tell()
-  w(b"xref\n")
-  w(b"0 5\n")
-  w(b"0000000000 65535 f \n")
-  for i in range(1, 5):
-    w(("%010d 00000 n \n" % offsets[i]).encode("ascii"))
-  w(b"trailer\n<< /Root 1 0 R /Size 5 >>\nstartxref\n")
-  w(("%d\n" % startxref).encode("ascii"))
-  w(b"%%EOF\n")
+  for num, obj in enumerate(DUMMY_OBJECTS, 1):
+    offsets[num] = pos
+    parts.append(obj)
+    pos += len(obj)
+
+  size = len(DUMMY_OBJECTS) + 1
+  startxref = pos
+  parts.append(b"xref\n")
+  parts.append(b"0 %d\n" % size)
+  parts.append(b"0000000000 65535 f \n")
+  # one encode for the whole xref body
+  parts.append("".join("%010d 00000 n \n" % offsets[i] for i in range(1, size)).encode("ascii"))
+  parts.append(b"trailer\n<< /Root 1 0 R /Size %d >>\nstartxref\n" % size)
+  parts.append(b"%d\n" % startxref)
+  parts.append(b"%%EOF\n")
 
   with open(path, "wb") as f:
-    f.write(buf)
+    f.write(b"".join(parts))
 
 # --- fix xref in-place using bytes only --------------------------------------
+# "\n<num> 0 obj\n"; trailing LF is a lookahead so back-to-back headers match
+OBJ_HEADER = re.compile(rb"\n(0|[1-9][0-9]*) 0 obj(?=\n)")
+
 def adjustPDF(contents: bytes) -> bytes:
   """
   Dumb xref fix for old-school xref (no holes), with hardcoded LF.
@@ -88,19 +115,16 @@ def adjustPDF(contents: bytes) -> bytes:
   objCount = int(origXref.splitlines()[1].split(b" ")[1])
   print("object count: %i" % objCount)
 
-  xrefLines = [
-    b"xref",
-    b"0 %i" % objCount,
-    b"0000000000 00001 f "
-  ]
+  # one pass over the file: object number -> offset of its first definition
+  table = {}
+  for m in OBJ_HEADER.finditer(contents):
+    table.setdefault(int(m.group(1)), m.start() + 1)
 
-  i = 1
-  while i < objCount:
-    off = contents.find(b"\n%i 0 obj\n" % i) + 1
-    xrefLines.append(b"%010i 00000 n " % (off))
-    i += 1
-
-  xref = b"\n".join(xrefLines)
+  # accumulate in place; entries are LF-separated with no trailing LF
+  xref = bytearray(b"xref\n0 %i\n0000000000 00001 f " % objCount)
+  for i in range(1, objCount):
+    xref += b"\n%010i 00000 n " % table.get(i, 0)
+  xref = bytes(xref)
 
   try:
     assert len(xref) == len(origXref)
@@ -129,20 +153,17 @@ in1, in2 = sys.argv[1], sys.argv[2]
 write_minimal_dummy_pdf("dummy.pdf")
 
 # Normalize inputs via mutool (merge each to flatten quirks)
-os.system(f'{MUTOOL} merge -o first.pdf {in1}')
-os.system(f'{MUTOOL} merge -o second.pdf {in2}')
-os.system(f'{MUTOOL} merge -o merged.pdf dummy.pdf {in1} {in2}')
-
-with open("first.pdf", "rb") as f:
-  d1 = f.read()
-with open("second.pdf", "rb") as f:
-  d2 = f.read()
+mutool("merge", "-o", "first.pdf", in1)
+mutool("merge", "-o", "second.pdf", in2)
+mutool("merge", "-o", "merged.pdf", "dummy.pdf", in1, in2)
+
+# first/second are only needed for their page count
+COUNT1 = readCount("first.pdf")
+COUNT2 = readCount("second.pdf")
+
 with open("merged.pdf", "rb") as f:
   dm = f.read()
 
-COUNT1 = getCount(d1)
-COUNT2 = getCount(d2)
-
 kids = EnclosedString(dm, b"/Kids[", b"]")
 # merged.pdf was built as: dummy + file1 + file2
 # skip first kid (the dummy), and drop trailing " 0 R"
@@ -178,8 +199,8 @@ endobj
 
 """
 
-KIDS1 = procreate(pages[:getCount(d1)])
-KIDS2 = procreate(pages[getCount(d1):])
+KIDS1 = procreate(pages[:COUNT1])
+KIDS2 = procreate(pages[COUNT1:])
 
 # IMPORTANT: bytes template -> mapping must use BYTES KEYS
 mapping = {
@@ -200,7 +221,7 @@ with open("hacked.pdf", "wb") as f:
   f.write(contents)
 
 # let mutool normalize objects/xref; -gggg like original
-os.system(f"{MUTOOL} clean -gggg hacked.pdf cleaned.pdf")
+mutool("clean", "-gggg", "hacked.pdf", "cleaned.pdf")
 
 with open("cleaned.pdf", "rb") as f:
   cleaned = f.read()
@@ -216,13 +237,10 @@ with open("pdf1.bin", "rb") as f:
 with open("pdf2.bin", "rb") as f:
   prefix2 = f.read()
 
-file1 = prefix1 + b"\n" + cleaned[192:]
-file2 = prefix2 + b"\n" + cleaned[192:]
-
-with open("collision1.pdf", "wb") as f:
-  f.write(file1)
-with open("collision2.pdf", "wb") as f:
-  f.write(file2)
+# shared suffix is written straight from the cleaned buffer (no concat copies)
+suffix = memoryview(cleaned)[192:]
+md5 = write_parts("collision1.pdf", (prefix1, b"\n", suffix))
+md5_2 = write_parts("collision2.pdf", (prefix2, b"\n", suffix))
 
 # cleanup intermediates
 for tmp in ("first.pdf","second.pdf","merged.pdf","hacked.pdf","cleaned.pdf","dummy.pdf"):
@@ -230,14 +248,13 @@ for tmp in ("first.pdf","second.pdf","merged.pdf","hacked.pdf","cleaned.pdf","du
   except OSError: pass
 
 # verify MD5s match
-md5 = hashlib.md5(file1).hexdigest()
-assert md5 == hashlib.md5(file2).hexdigest()
+assert md5 == md5_2
 
 # show some info (non-fatal if mutool lacks -X)
 print()
-os.system(f"{MUTOOL} info -X collision1.pdf")
+mutool("info", "-X", "collision1.pdf")
 print("\n")
-os.system(f"{MUTOOL} info -X collision2.pdf")
+mutool("info", "-X", "collision2.pdf")
 print()
 print("MD5:", md5)
 print("Success!")
\ No newline at end of file
@@ -2,9 +2,17 @@
 # 02232 Applied Cryptography - Fall 2025
 import hashlib,pathlib
 
+def _new(algo):
+    # md5/sha1 are only used to study collisions, not for security,
+    # so skip the FIPS-guarded constructor
+    return hashlib.new(algo,usedforsecurity=algo.lower() not in ("md5","sha1"))
+
 def file_hash(path, algo="md5"):
-    # calc file hash
-    data=pathlib.Path(path).read_bytes()
-    h=hashlib.new(algo)
-    h.update(data)
+    # calc file hash (streamed, the file is never loaded whole)
+    with open(pathlib.Path(path),"rb",buffering=0) as f:
+        if hasattr(hashlib,"file_digest"):  # py3.11+
+            return hashlib.file_digest(f,lambda: _new(algo)).hexdigest()
+        h=_new(algo)
+        while chunk:=f.read(1<<20):
+            h.update(chunk)
     return h.hexdigest()
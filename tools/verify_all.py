@@ -1,17 +1,36 @@
 #!/usr/bin/env python3
 # Author: Alfonso Pedro Ridao (s243942)
 # 02232 Applied Cryptography - Fall 2025
-import sys
+import os, sys
 import json, pathlib
 import hashlib,argparse
 import glob
-
-# quick hash helper
-def h(p: pathlib.Path, algo: str) -> str:
-    return hashlib.new(algo, p.read_bytes()).hexdigest()
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+# empty hashers to clone; copy() skips the hashlib.new name lookup
+_PROTOS={
+    "md5": hashlib.new("md5",usedforsecurity=False),
+    "sha256": hashlib.new("sha256"),
+}
+
+# md5 + sha256 of a file in a single streamed pass
+def digests(p: pathlib.Path):
+    md5=_PROTOS["md5"].copy()
+    sha=_PROTOS["sha256"].copy()
+    with open(p,"rb",buffering=0) as f:
+        while chunk:=f.read(1<<20):
+            md5.update(chunk)
+            sha.update(chunk)
+    return md5.hexdigest(),sha.hexdigest()
+
+# parsed manifests, keyed on mtime so edits are picked up
+@functools.lru_cache(maxsize=256)
+def _load_manifest(path_str: str, mtime_ns: int):
+    return json.loads(pathlib.Path(path_str).read_text())
 
 def verify_manifest(mpath: pathlib.Path):
-    m=json.loads(mpath.read_text())
+    m=_load_manifest(str(mpath),mpath.stat().st_mtime_ns)
     base=mpath.parent
     arts = m.get("artifacts") or []
     if len(arts)<2:
@@ -20,9 +39,11 @@ def verify_manifest(mpath: pathlib.Path):
     f1=(base / arts[0]).resolve()
     f2=(base / arts[1]).resolve()
 
-    # calc hashes
-    md5_equal= h(f1,"md5")==h(f2,"md5")
-    sha256_diff = h(f1, "sha256")!=h(f2, "sha256")
+    # calc hashes (each file read once)
+    m1,s1=digests(f1)
+    m2,s2=digests(f2)
+    md5_equal= m1==m2
+    sha256_diff = s1!=s2
 
     return {
         "technique": m.get("technique","?"),
@@ -34,6 +55,23 @@ def verify_manifest(mpath: pathlib.Path):
         "sha256_diff": sha256_diff,
     }
 
+def _safe_verify(m: str):
+    mpath=pathlib.Path(m)
+    try:
+        return verify_manifest(mpath)
+    except Exception as e:
+        # on error show row with fails
+        return {
+            "technique": "?",
+            "language": "?",
+            "manifest": str(mpath),
+            "f1": "?",
+            "f2": "?",
+            "md5_equal": False,
+            "sha256_diff": False,
+            "_err": str(e),
+        }
+
 
 def main():
     ap=argparse.ArgumentParser(
@@ -64,28 +102,10 @@ def main():
     DIM = "\033[2m" if use_color else ""
     RESET="\033[0m" if use_color else ""
 
-    def paint_bool(val: bool,width: int)->str:
-        raw=("True" if val else "False").ljust(width)
-        return f"{GREEN}{raw}{RESET}" if val else f"{RED}{raw}{RESET}"
-
-    results=[]
-    for m in manifest_paths:
-        mpath=pathlib.Path(m)
-        try:
-            res=verify_manifest(mpath)
-            results.append(res)
-        except Exception as e:
-            # on error show row with fails
-            results.append({
-                "technique": "?",
-                "language": "?",
-                "manifest": str(mpath),
-                "f1": "?",
-                "f2": "?",
-                "md5_equal": False,
-                "sha256_diff": False,
-                "_err": str(e),
-            })
+    # hash manifests in parallel; map() keeps the input order
+    workers=max(1,min(len(manifest_paths),os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        results=list(ex.map(_safe_verify,manifest_paths))
 
     if not results:
         print("No manifests found.",file=sys.stderr)
@@ -107,27 +127,29 @@ def main():
     underline=(
         f"{'-'*tech_w}  {'-'*lang_w}  {'-'*md5_w}  {'-'*sha_w}  {'-'*28}"
     )
-    print()
-    print(header)
-    print(underline)
+    out=["",header,underline]
+
+    # True/False cells are padded + painted once, rows just look them up
+    md5_cells={True: f"{GREEN}{'True'.ljust(md5_w)}{RESET}",
+               False: f"{RED}{'False'.ljust(md5_w)}{RESET}"}
+    sha_cells={True: f"{GREEN}{'True'.ljust(sha_w)}{RESET}",
+               False: f"{RED}{'False'.ljust(sha_w)}{RESET}"}
 
     # rows
     for r in results:
-        md5_cell=paint_bool(r["md5_equal"],md5_w)
-        sha_cell = paint_bool(r["sha256_diff"], sha_w)
-        line=(
-            f"{r['technique'].ljust(tech_w)}  "
-            f"{r['language'].ljust(lang_w)}  "
-            f"{md5_cell}  "
-            f"{sha_cell}  "
-            f"{r['manifest']}"
-        )
-        print(line)
+        out.append("  ".join((
+            r["technique"].ljust(tech_w),
+            r["language"].ljust(lang_w),
+            md5_cells[r["md5_equal"]],
+            sha_cells[r["sha256_diff"]],
+            r["manifest"],
+        )))
         # if there was an error show a dim hint
         if "_err" in r:
-            print(f"{DIM}   ↳ error: {r['_err']}{RESET}")
+            out.append(f"{DIM}   ↳ error: {r['_err']}{RESET}")
 
-    print()
+    out.append("")
+    sys.stdout.write("\n".join(out)+"\n")
     return 0
 
 if __name__=="__main__":